@@ -1,5 +1,50 @@
 import importlib
 import logging
+import weakref
+
+#: cache of the classes resolved from their paths in :meth:`Entity.from_params`
+_CLS_CACHE = weakref.WeakValueDictionary()
+
+#: shared default for missing params in :meth:`Entity.from_dict`, which must not be mutated
+_EMPTY = {}
+
+
+def _resolve_cls(cls):
+    """
+    Import and return the class definition for the `cls` path, caching the result
+
+    Args:
+        cls (str): The qualified `module.class_name`. If no `module` is in the string,
+            then it is assumed to be "microbenthos".
+
+    Raises:
+        TypeError: if the class could not be found
+    """
+    try:
+        return _CLS_CACHE[cls]
+    except KeyError:
+        pass
+
+    try:
+        cls_modname, cls_name = cls.rsplit('.', 1)
+    except ValueError:
+        # this is then just a class name to import from microbenthos
+        cls_modname = 'microbenthos'
+        cls_name = cls
+
+    try:
+        cls_module = importlib.import_module(cls_modname)
+        CLS = getattr(cls_module, cls_name)
+    except (ImportError, AttributeError):
+        raise TypeError('Class {} in {} could not be found!'.format(cls_name, cls_modname))
+
+    try:
+        _CLS_CACHE[cls] = CLS
+    except TypeError:
+        # not weak-referenceable, so just skip the caching
+        pass
+
+    return CLS
 
 
 # Todo: refactor :meth:`DomainEntity.set_domain` out of API
@@ -61,21 +106,8 @@ class Entity(object):
         """
         logger = logging.getLogger(__name__)
         logger.debug('Setting up entity from cls: {}'.format(cls))
-        try:
-            cls_modname, cls_name = cls.rsplit('.', 1)
-        except ValueError:
-            # raise ValueError('Path {} could not be split into module & class'.format(cls))
-            # this is then just a class name to import from microbenthos
-            cls_modname = 'microbenthos'
-            cls_name = cls
-
-        try:
-            # logger.debug('Importing {}'.format(cls_modname))
-            cls_module = importlib.import_module(cls_modname)
-            CLS = getattr(cls_module, cls_name)
-            logger.debug('Using class: {}'.format(CLS))
-        except (ImportError, AttributeError):
-            raise TypeError('Class {} in {} could not be found!'.format(cls_name, cls_modname))
+        CLS = _resolve_cls(cls)
+        logger.debug('Using class: {}'.format(CLS))
 
         logger.debug('Init params: {}'.format(init_params))
         inst = CLS(**init_params)
@@ -112,8 +144,8 @@ class Entity(object):
             logger.error('"cls" missing in def: {}'.format(cdict))
             raise KeyError('Config dict missing required key "cls"!')
 
-        init_params = cdict.get('init_params', {})
-        post_params = cdict.get('post_params', {})
+        init_params = cdict.get('init_params', _EMPTY)
+        post_params = cdict.get('post_params', _EMPTY)
 
         return cls.from_params(cls=cls_path, init_params=init_params, post_params=post_params)
 
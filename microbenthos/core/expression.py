@@ -1,7 +1,59 @@
+import functools
 import logging
 from collections.abc import Mapping
 
 import sympy as sp
+from sympy.parsing.sympy_parser import (convert_xor, parse_expr, standard_transformations,
+                                        TokenError)
+
+#: transformations for :func:`~sympy.parsing.sympy_parser.parse_expr`, the same as those used by
+#: :func:`~sympy.core.sympify.sympify`, so that formulas parse as in the schema validation
+_TRANSFORMATIONS = standard_transformations + (convert_xor,)
+
+
+def _make_global_dict():
+    """
+    Build the global namespace that :func:`~sympy.parsing.sympy_parser.parse_expr` otherwise
+    recreates on every call
+    """
+    import builtins
+    import types
+
+    global_dict = {}
+    exec('from sympy import *', global_dict)
+    for name, obj in vars(builtins).items():
+        if isinstance(obj, types.BuiltinFunctionType):
+            global_dict[name] = obj
+    global_dict['max'] = sp.Max
+    global_dict['min'] = sp.Min
+    return global_dict
+
+
+#: global namespace for :func:`~sympy.parsing.sympy_parser.parse_expr`
+_GLOBAL_DICT = _make_global_dict()
+
+
+def _symbols_of(expr):
+    """
+    Returns:
+        set: atoms in `expr` which are of type :class:`~sympy.core.symbol.Symbol`
+    """
+    if isinstance(expr, sp.Basic):
+        return expr.atoms(sp.Symbol)
+    return set()
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_cached(formula, ns_key):
+    """
+    Parse the `formula` string with :func:`~sympy.parsing.sympy_parser.parse_expr`, with the
+    local namespace given as the sorted tuple of items `ns_key`. The results are cached, so that
+    identical formulas are parsed only once across :class:`Expression` instances.
+    """
+    return parse_expr(formula.replace('\n', ''),
+                      local_dict=dict(ns_key),
+                      global_dict=_GLOBAL_DICT,
+                      transformations=_TRANSFORMATIONS)
 
 
 class Expression(object):
@@ -59,7 +111,7 @@ class Expression(object):
                                         dict(where="y>0", expr= "1"),
                                         dict(where="y<=0", expr= "0.25*x"),
                                         ]))
-                Expression(formula="3x * myXvar",
+                Expression(formula="3*x * myXvar",
                            derived=dict(myXvar="sin(x)**(x-0.5/(2-x))"))
 
         """
@@ -68,28 +120,47 @@ class Expression(object):
 
         self.name = name or 'unnamed'
 
-        #: the namespace used for :func:`~sympy.core.sympify.sympify`
-        self._sympy_ns = self._sympy_ns.copy()
-
         namespace = namespace or {}
+        derived = derived or {}
+
+        # the class namespace is only copied when it needs to be extended for this instance
+        if namespace or derived:
+            self._sympy_ns = self._sympy_ns.copy()
+
+        # version of :attr:`._sympy_ns`, bumped when it is extended, to rebuild the key for
+        # parsed formulas only when necessary
+        self._ns_version = 0
+        self._ns_key_cache = None
+
         for name, itemdef in namespace.items():
             self._update_namespace(name,
                                    vars=itemdef['vars'],
                                    expr=itemdef['expr'])
 
-        derived = derived or {}
         for name, dstr in derived.items():
             dexpr = self._sympify(dstr)
             self.logger.debug('Derived {!r}: {}'.format(name, dexpr))
             self._sympy_ns[name] = dexpr
+            self._ns_version += 1
 
-        self._pieces = []
+        # the expressions and conditions of the pieces, as parallel lists
+        self._piece_exprs = []
+        self._piece_conds = []
         #: the base expression as a sympy Expr
         self.base = None
+        # the symbols of the base and the pieces, updated as they are added
+        self._symbols = frozenset()
+
+        # cached results of :meth:`.expr` and :meth:`.diff`, reset in :meth:`.add_piece`
+        self._expr_cache = None
+        self._diff_cache = {}
+        # numerical callables of :meth:`.expr` created in :meth:`.as_callable`
+        self._lambdified = {}
 
         if formula:
             base, pieces = self.parse_formula(formula)
             self.base = base
+            self._symbols = self._symbols.union(_symbols_of(base))
 
             self.logger.debug('Added base expr {!r}'.format(base))
 
@@ -98,15 +169,24 @@ class Expression(object):
 
         self.logger.debug(
             '{} created with base {!r} and {} pieces'.format(
-                self, self.base, len(self._pieces)))
+                self, self.base, len(self._piece_exprs)))
 
     def __repr__(self):
         return 'Expr({})'.format(self.name)
 
+    @property
+    def _pieces(self):
+        """
+        Returns:
+            list: the ``(expr, condition)`` pairs added through :meth:`.add_piece`
+        """
+        return list(zip(self._piece_exprs, self._piece_conds))
+
     def _update_namespace(self, name, vars, expr):
         self.logger.debug('Adding to namespace {!r}: {}'.format(name, expr))
         func = sp.Lambda(sp.symbols(vars), expr)
         self._sympy_ns[name] = func
+        self._ns_version += 1
 
     def parse_formula(self, formula):
         """
@@ -143,10 +223,8 @@ class Expression(object):
         elif isinstance(formula, Mapping):
             # keys are "base" expr, "pieces" with list of (expr, where) pairs
             base = self._sympify(formula.get('base', 1))
-            for piece in formula.get('pieces', []):
-                expr = piece['expr']
-                cond = piece['where']
-                expressions.append((self._sympify(expr), self._sympify(cond)))
+            expressions = [(self._sympify(piece['expr']), self._sympify(piece['where']))
+                           for piece in formula.get('pieces', ())]
 
         else:
             raise ValueError('Improper input for formula: {}'.format(type(formula)))
@@ -154,11 +232,27 @@ class Expression(object):
         self.logger.debug('Parsed (expr, cond): {}'.format(expressions))
         return base, expressions
 
+    def _ns_key(self):
+        """
+        Returns:
+            tuple: the hashable items of :attr:`._sympy_ns` sorted by name, rebuilt only when the
+            namespace has been extended
+        """
+        if self._ns_key_cache is None or self._ns_key_cache[0] != self._ns_version:
+            key = tuple(sorted(self._sympy_ns.items(), key=lambda kv: kv[0]))
+            self._ns_key_cache = (self._ns_version, key)
+        return self._ns_key_cache[1]
+
     def _sympify(self, formula):
         """
         Run the given formula expression through :func:`~sympy.core.sympify.sympify` using the
         :attr:`._sympy_ns` namespace.
 
+        String formulas are parsed directly with :func:`~sympy.parsing.sympy_parser.parse_expr`
+        and the same transformations as sympify, which avoids rebuilding the sympy global
+        namespace for each formula. The parsed expressions are cached on the formula and the
+        namespace contents.
+
         Args:
             formula (str): the expression as str
 
@@ -171,9 +265,12 @@ class Expression(object):
         """
         try:
             self.logger.debug('Sympify {!r}'.format(formula))
-            expr = sp.sympify(formula, locals=self._sympy_ns)
+            if isinstance(formula, str):
+                expr = _parse_cached(formula, self._ns_key())
+            else:
+                expr = sp.sympify(formula, locals=self._sympy_ns)
             return expr
-        except (sp.SympifyError, SyntaxError):
+        except (sp.SympifyError, SyntaxError, TokenError):
             self.logger.error('Sympify failed on {}'.format(formula))
             raise ValueError('Could not parse formula {}'.format(formula))
 
@@ -198,29 +295,72 @@ class Expression(object):
             raise ValueError('condition {!r} not a sympy Expr, but {}'.format(condition,
                                                                               type(condition)))
 
-        self._pieces.append((expr, condition))
+        self._piece_exprs.append(expr)
+        self._piece_conds.append(condition)
+        self._symbols = self._symbols.union(_symbols_of(expr), _symbols_of(condition))
+        self._expr_cache = None
+        self._diff_cache.clear()
+        self._lambdified.clear()
 
     def symbols(self):
         """
         Returns:
-            set: atoms in :meth:`.expr` which are of type :class:`~sympy.core.symbol.Symbol`
+            frozenset: atoms in :meth:`.expr` which are of type :class:`~sympy.core.symbol.Symbol`,
+            tracked as the base and pieces are added
         """
-        return {_ for _ in self.expr().atoms() if isinstance(_, sp.Symbol)}
+        return self._symbols
 
     def expr(self):
         """
         Evaluate the symbolic expression
 
+        The result is cached until the next call to :meth:`.add_piece`.
+
         Returns:
             :class:`~sympy.core.expr.Expr`: full expression including piece-wise definitions
 
         """
-        if self._pieces:
-            pieces = sum(e * c for e, c in self._pieces)
-            out = self.base * pieces
-        else:
-            out = self.base
-        return out
+        if self._expr_cache is None:
+            if self._piece_exprs:
+                # a single Add over all the terms, instead of the pairwise sums of sum()
+                pieces = sp.Add(*map(sp.Mul, self._piece_exprs, self._piece_conds))
+                out = self.base * pieces
+            else:
+                out = self.base
+            self._expr_cache = out
+        return self._expr_cache
+
+    def as_callable(self, symbols_order, modules = 'numpy'):
+        """
+        Create a numerical function of :meth:`.expr` through :func:`~sympy.utilities.lambdify`.
+
+        The function is created once for each ordering of the symbols and modules and then
+        reused, until the next call to :meth:`.add_piece`.
+
+        Args:
+            symbols_order (iterable): the symbols (or names) in the order of the arguments of
+                the returned function
+            modules: passed to :func:`~sympy.utilities.lambdify`
+
+        Returns:
+            callable: the function that evaluates the expression numerically
+
+        """
+        if isinstance(modules, list):
+            # lists of modules, as documented by sympy, are made hashable for the key
+            modules = tuple(modules)
+        key = (tuple(symbols_order), modules)
+        try:
+            func = self._lambdified.get(key)
+        except TypeError:
+            # modules with mappings of names are not hashable, so the function is not cached
+            key, func = None, None
+        if func is None:
+            self.logger.debug('Lambdifying {} with args {}'.format(self, tuple(symbols_order)))
+            func = sp.lambdify(tuple(symbols_order), self.expr(), modules=modules)
+            if key is not None:
+                self._lambdified[key] = func
+        return func
 
     def diff(self, *args):
         """
@@ -233,10 +373,21 @@ class Expression(object):
             :class:`~sympy.core.expr.Expr`: full expression including piece-wise definitions
 
         """
-        if self._pieces:
-            ret = sum((self.base * e).diff(*args) * c for e, c in self._pieces)
+        ret = self._diff_cache.get(args)
+        if ret is not None:
+            return ret
+
+        diff_symbols = {a for a in args if isinstance(a, sp.Symbol)}
+        if diff_symbols and not diff_symbols & self.symbols():
+            # the expression is constant with respect to the symbols
+            ret = sp.S.Zero
+        elif self._piece_exprs:
+            ret = sp.Add(*[(self.base * e).diff(*args) * c
+                           for e, c in zip(self._piece_exprs, self._piece_conds)])
         else:
             ret = self.base.diff(*args)
+
+        self._diff_cache[args] = ret
         return ret
 
     __call__ = expr
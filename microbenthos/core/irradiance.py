@@ -1,13 +1,55 @@
 import logging
+import math
 
 from fipy import PhysicalField, Variable
 from fipy.tools import numerix
-from scipy.stats import cosine
 
 from .entity import DomainEntity
 from ..utils.snapshotters import snapshot_var, restore_var
 
 
+def _attenuation_numpy(k, d, out):
+    """
+    Compute ``cumprod(exp(-k * d))`` along the rows of the 2-D array `k` into `out`, where `d`
+    holds the distances of the cells. This is evaluated as ``exp(cumsum(-k * d))``, which is a
+    running sum and a single pass of :func:`exp`.
+    """
+    numerix.multiply(k, d, out=out)
+    numerix.negative(out, out=out)
+    numerix.cumsum(out, axis=-1, out=out)
+    return numerix.exp(out, out=out)
+
+
+try:
+    import numba
+except ImportError:
+    _attenuation_numba = None
+else:
+    @numba.njit(cache=True, fastmath=True)
+    def _attenuation_numba(k, d, out):
+        """
+        As :func:`_attenuation_numpy`, fused into a single loop over the cells of each row
+        """
+        for j in range(out.shape[0]):
+            acc = 0.0
+            for i in range(out.shape[1]):
+                acc -= k[j, i] * d[i]
+                out[j, i] = math.exp(acc)
+        return out
+
+#: the attenuation kernel, compiled with :mod:`numba` if it is installed
+_attenuation_kernel = _attenuation_numba or _attenuation_numpy
+
+
+def _cell_distances(domain):
+    """
+    Returns:
+        :class:`numpy.ndarray`: the distances of the cells of the `domain` in base units, as a
+        contiguous float array
+    """
+    return numerix.ascontiguousarray(domain.distances.numericValue, dtype=float)
+
+
 class Irradiance(DomainEntity):
     """
     Class that represents a source of irradiance in the model domain.
@@ -65,17 +107,19 @@ class Irradiance(DomainEntity):
         #: the intensity level at the zenith time
         self.zenith_level = 100.0
 
-        C = 1.0 / numerix.sqrt(2 * numerix.pi)
-        # to scale the cosine distribution from 0 to 1 (at zenith)
-
-        self._profile = cosine(
-            loc=self.zenith_time, scale=C ** 2 * self.hours_day)
-        # This profile with loc=zenith means that the day starts at "midnight" and zenith occurs
-        # in the center of the daylength
+        # numeric invariants (in base units) for :meth:`.on_time_updated`
+        self._hours_total_ = float(self.hours_total.numericValue)
+        self._zenith_time_ = float(self.zenith_time.numericValue)
+        self._profile_scale_ = float(self.hours_day.numericValue) / (2 * math.pi)
 
         #: a :class:`Variable` for the momentary radiance level at the surface
         self.surface_irrad = Variable(name='irrad_surface', value=0.0, unit=None)
 
+        # scratch array for the stacked attenuation profiles of the channels
+        self._profiles_buf = None
+        # the distances of the domain cells, set on first use
+        self._distances = None
+
         if channels:
             for chinfo in channels:
                 self.create_channel(**chinfo)
@@ -143,25 +187,42 @@ class Irradiance(DomainEntity):
 
         """
         if isinstance(clocktime, PhysicalField):
-            clocktime_ = clocktime.inBaseUnits() % self.hours_total.inBaseUnits()
+            # scale by the unit factor, rather than creating a new field in base units
+            clocktime_ = float(clocktime.value) * clocktime.unit.factor % self._hours_total_
         else:
-            clocktime_ = clocktime % self.hours_total.numericValue
+            clocktime_ = clocktime % self._hours_total_
 
-        # logger.debug('clock % hours_total =  {} % {} = {}'.format(
-        #     clock, self.hours_total, clocktime_))
-        # logger.debug('Profile level for clock {}: {}'.format(
-        #     clock, self._profile.pdf(clocktime_)))
-
-        surface_value = self.zenith_level * self.hours_day.numericValue / 2.0 * \
-                        self._profile.pdf(clocktime_)
+        # cosine profile of the illuminated period (-pi <= u <= pi) centered on the zenith, where
+        # it reaches the zenith level, and zero outside of it
+        u = (clocktime_ - self._zenith_time_) / self._profile_scale_
+        if -math.pi <= u <= math.pi:
+            surface_value = self.zenith_level * 0.5 * (1.0 + math.cos(u))
+        else:
+            surface_value = 0.0
 
         self.surface_irrad.value = surface_value
-        self.logger.debug('Updated for time {} surface irradiance: {}'.format(clocktime,
-                                                                              self.surface_irrad))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Updated for time {} surface irradiance: {}'.format(
+                clocktime, self.surface_irrad))
 
-        for channel in self.channels.values():
-            #: TODO: remove explicit calling by using Variable?
-            channel.update_intensities(self.surface_irrad)
+        channels = list(self.channels.values())
+        if channels:
+            # compute the attenuation profiles of all channels in a single pass
+            for channel in channels:
+                if not channel.is_setup:
+                    self.logger.warning('Attenuation definition may be incomplete!')
+            if self._distances is None:
+                self._distances = _cell_distances(self.domain)
+            k = numerix.array([c.k_var.numericValue for c in channels], dtype=float)
+            if self._profiles_buf is None or self._profiles_buf.shape != k.shape:
+                self._profiles_buf = numerix.empty(k.shape)
+            profiles = _attenuation_kernel(k, self._distances, self._profiles_buf)
+            # scale all the profiles by the surface level in one broadcast
+            numerix.multiply(profiles, float(surface_value), out=profiles)
+
+            for channel, intensities in zip(channels, profiles):
+                #: TODO: remove explicit calling by using Variable?
+                channel.update_intensities(surface_value, intensities=intensities)
 
     def snapshot(self, base = False):
         """
@@ -257,6 +318,8 @@ class IrradianceChannel(DomainEntity):
         #: list of modulations for the attenuation in :attr:`.k0`
         self.k_mods = k_mods or []
         self._mods_added = {}
+        # (base, k_var values, state) of the attenuation in the last :meth:`.snapshot`
+        self._atten_snapshot = None
         self.logger.debug('Created irradiance channel {}'.format(self))
 
     def __repr__(self):
@@ -360,7 +423,7 @@ class IrradianceChannel(DomainEntity):
         Returns:
             bool: True if all pending attenuation sources in :attr:`.k_mods` have been added
         """
-        pending = set([k[0] for k in self.k_mods]).difference(set(self._mods_added))
+        pending = {k[0] for k in self.k_mods} - self._mods_added.keys()
         if pending:
             self.logger.warning('Attenuation sources for {!r} still pending: {}'.format(
                 self,
@@ -374,25 +437,38 @@ class IrradianceChannel(DomainEntity):
 
         This returns the cumulative product of attenuation factors in each cell of the domain,
         allowing this to be multiplied by a surface value to get the irradiance intensity profile.
+
+        The profile is computed by a fused kernel, which is compiled with :mod:`numba` if it is
+        installed, and a new array is returned on each call.
         """
         if not self.is_setup:
             self.logger.warning('Attenuation definition may be incomplete!')
-        return numerix.cumprod(numerix.exp(-1 * self.k_var * self.domain.distances))
+        # k_var and distances in base units (1/m and m), so the product is dimensionless
+        k = numerix.asarray(self.k_var.numericValue, dtype=float)[numerix.newaxis]
+        return _attenuation_kernel(k, _cell_distances(self.domain), numerix.empty(k.shape))[0]
 
-    def update_intensities(self, surface_level):
+    def update_intensities(self, surface_level, intensities = None):
         """
         Update the :attr:`.intensities` of the channel based on the surface level
 
         Args:
             surface_level: The variable indicating the surface intensity
+            intensities (None, :class:`numpy.ndarray`): the intensity profile, if it was already
+                computed together with other channels by :class:`Irradiance`
 
         Returns:
-            :class:`numpy.ndarray`: The intensity profile through the domain
+            :class:`numpy.ndarray`: The intensity profile through the domain, which is the value
+            array of :attr:`.intensities` and so is updated in place on the next call
         """
-        self.logger.debug('Updating intensities for surface value: {}'.format(surface_level))
-        intensities = self.attenuation_profile * surface_level
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Updating intensities for surface value: {}'.format(surface_level))
+        if intensities is None:
+            intensities = self.attenuation_profile
+            numerix.multiply(intensities, float(surface_level), out=intensities)
+
+        # fipy copies into the existing value array, so no new arrays are created per update
         self.intensities.value = intensities
-        return intensities
+        return self.intensities.value
 
     def snapshot(self, base = False):
         """
@@ -409,6 +485,9 @@ class IrradianceChannel(DomainEntity):
             * "metadata"
                 * "k0" : str(:attr:`.k0`)
 
+        The "attenuation" state is reused from the previous snapshot if :attr:`.k_var` is
+        unchanged.
+
         Args:
             base (bool): Convert to base units?
 
@@ -426,11 +505,17 @@ class IrradianceChannel(DomainEntity):
         meta = state['metadata']
         meta['k0'] = str(self.k0)
 
-        atten = state['attenuation'] = {}
-        ameta = atten['metadata'] = {}
-        for varname, val in self.k_mods:
-            ameta[varname] = str(val)
-        atten['data'] = snapshot_var(self.k_var, base=base)
+        k = numerix.asarray(self.k_var.value)
+        cached = self._atten_snapshot
+        if cached is not None and cached[0] == base and numerix.array_equal(cached[1], k):
+            state['attenuation'] = cached[2]
+        else:
+            atten = state['attenuation'] = {}
+            ameta = atten['metadata'] = {}
+            for varname, val in self.k_mods:
+                ameta[varname] = str(val)
+            atten['data'] = snapshot_var(self.k_var, base=base)
+            self._atten_snapshot = (base, numerix.array(k), atten)
 
         inten = state['intensity'] = {}
         inten['data'] = snapshot_var(self.intensities, base=base)
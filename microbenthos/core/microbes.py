@@ -46,6 +46,9 @@ class MicrobialGroup(DomainEntity):
         #: :class:`~microbenthos.core.process.Process`.
         self.processes = {}
 
+        # features and processes to update on clock time, reset when either is added
+        self._tick_targets = None
+
         if features:
             for fname, fdict in dict(features).items():
                 self.add_feature_from(fname, **fdict)
@@ -65,16 +68,13 @@ class MicrobialGroup(DomainEntity):
         """
         Item getter to behave like a domain
         """
-        if item in self.VARS:
-            return self.VARS[item]
-        else:
+        var = self.VARS.get(item)
+        if var is None:
             return self.domain[item]
+        return var
 
     def __contains__(self, item):
-        if item in self.VARS:
-            return True
-        else:
-            return item in self.domain
+        return item in self.VARS or item in self.domain
 
     def add_feature_from(self, name, **params):
         """
@@ -101,6 +101,7 @@ class MicrobialGroup(DomainEntity):
         self.logger.debug(
             '{} added feature {}: {}'.format(self, name, instance))
         self.features[name] = instance
+        self._tick_targets = None
 
     def add_process_from(self, name, **params):
         """
@@ -122,6 +123,7 @@ class MicrobialGroup(DomainEntity):
         self.logger.debug(
             '{} added process {}: {}'.format(self, name, instance))
         self.processes[name] = instance
+        self._tick_targets = None
 
     @property
     def biomass(self):
@@ -190,11 +192,15 @@ class MicrobialGroup(DomainEntity):
         """
         When model clock updated, delegate to feature and process instances
         """
-        self.logger.debug('Updating {}'.format(self))
-        for obj in itertools.chain(
-            self.features.values(),
-            self.processes.values()
-            ):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Updating {}'.format(self))
+        if self._tick_targets is None:
+            self._tick_targets = tuple(itertools.chain(
+                self.features.values(),
+                self.processes.values()
+                ))
+
+        for obj in self._tick_targets:
             obj.on_time_updated(clocktime)
 
     def snapshot(self, base = False):
@@ -1,4 +1,6 @@
+import functools
 import logging
+import numbers
 from collections.abc import Mapping
 
 import sympy as sp
@@ -9,6 +11,15 @@ from ..core import DomainEntity
 from ..utils import snapshot_var
 
 
+@functools.lru_cache(maxsize=1024)
+def _lambdify_cached(args, expr, modules):
+    """
+    Lambdify `expr` on the symbols `args` with common subexpression elimination. The functions
+    are cached, so that processes with the same expression and arguments share the function.
+    """
+    return sp.lambdify(args, expr, modules=modules, cse=True)
+
+
 class Process(DomainEntity):
     """
     Class to represent a reaction occurring in the model domain.
@@ -47,6 +58,16 @@ class Process(DomainEntity):
         kwargs['logger'] = self.logger
         super(Process, self).__init__(**kwargs)
 
+        # argument names and lambdified function for each (expr, param names, event names) in
+        # :meth:`.evaluate`, reset when expr is set
+        self._eval_plans = {}
+        # the term from :meth:`.as_term` for :meth:`.snapshot`, reset when expr or params change
+        self._term = None
+        # params in base units for :meth:`.evaluate`, as ``name: (param, converted)``
+        self._params_base = {}
+        # metadata of :meth:`.snapshot`, as ``(key, param values, metadata)``
+        self._snapshot_meta = None
+
         self._expr = None
         self.expr = expr
         assert isinstance(self.expr, Expression)
@@ -90,6 +111,8 @@ class Process(DomainEntity):
             raise ValueError('Need an Expression but got {}'.format(type(e)))
 
         self._expr = e
+        self._eval_plans.clear()
+        self._term = None
 
     def evaluate(self, expr, params = None, domain = None):
         """
@@ -103,7 +126,11 @@ class Process(DomainEntity):
         :attr:`.events` container.
 
         The symbols from the expression are collected, the expression lambdified and then
-        evaluated using the objects sourced from the containers and events.
+        evaluated using the objects sourced from the containers and events. Params with plain
+        numerical values (without units) are substituted into the expression before it is
+        lambdified. The symbols and the lambdified function are determined once for each
+        expression and then reused. The lambdified functions are also shared between processes
+        with the same expression.
 
         Args:
             expr (int, :class:`~sympy.core.expr.Expr`): The expression to evaluate
@@ -114,7 +141,8 @@ class Process(DomainEntity):
             evaluated result typically one of (:class:`fipy binOp`, :class:`numpy.ndarray`)
 
         """
-        self.logger.debug('Evaluating expr {!r}'.format(expr))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Evaluating expr {!r}'.format(expr))
 
         if not domain:
             self.check_domain()
@@ -123,45 +151,97 @@ class Process(DomainEntity):
         if not params:
             params = self.params
 
-        expr_symbols = filter(lambda a: isinstance(a, sp.Symbol), expr.atoms())
-        param_symbols = tuple(sp.symbols(tuple(params.keys())))
+        # plain numbers are substituted into the expression, so their values are part of the key
+        constants = tuple((name_, value) for name_, value in params.items()
+                          if isinstance(value, numbers.Real))
+        key = (expr, tuple(params), constants, tuple(self.events))
+        plan = self._eval_plans.get(key)
+        if plan is None:
+            plan = self._eval_plans[key] = self._create_eval_plan(expr, params, dict(constants))
+        var_names, param_names, event_names, expr_func = plan
 
-        event_name_symbols = tuple(sp.symbols(tuple(self.events.keys())))
-        var_symbols = tuple(set(expr_symbols).difference(
-            set(param_symbols).union(set(event_name_symbols))))
-        # self.logger.debug('Params available: {}'.format(param_symbols))
-        # self.logger.debug('Vars to come from domain: {}'.format(var_symbols))
-        allsymbs = var_symbols + param_symbols + event_name_symbols
+        args = [domain[name_] for name_ in var_names]
 
-        args = []
-        for symbol in allsymbs:
-            name_ = str(symbol)
-            if symbol in var_symbols:
-                args.append(domain[name_])
+        for name_ in param_names:
+            args.append(self._param_in_base_units(name_, params[name_]))
 
-            elif symbol in param_symbols:
-                param = params[name_]
-                if hasattr(param, 'unit'):
-                    # convert fipy.PhysicalField to base units
-                    param = param.inBaseUnits()
+        for name_ in event_names:
+            args.append(self.events[name_].event_time)
 
-                args.append(param)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Evaluating with {}'.format(
+                list(zip(var_names + param_names + event_names, args))))
+        return expr_func(*args)
 
-            elif symbol in event_name_symbols:
-                event = self.events[name_]
-                # assert isinstance(event, ProcessEvent)
-                args.append(event.event_time)
+    def _param_in_base_units(self, name, param):
+        """
+        Convert a :class:`fipy.PhysicalField` param to base units. The conversion is reused while
+        the same `param` object is given for the `name`.
 
-            else:
-                raise RuntimeError('Unknown symbol {!r} in args list'.format(symbol))
+        Args:
+            name (str): the name of the param
+            param: the param value
 
-        # self.logger.debug('Lambdifying with args: {}'.format(allsymbs))
-        expr_func = sp.lambdify(allsymbs, expr, modules=self._lambdify_modules)
+        Returns:
+            the param in base units, or `param` if it has no units
+        """
+        cached = self._params_base.get(name)
+        if cached is not None and cached[0] is param:
+            return cached[1]
 
-        self.logger.debug('Evaluating with {}'.format(zip(allsymbs, args)))
-        return expr_func(*args)
+        converted = param
+        if hasattr(param, 'unit'):
+            # convert fipy.PhysicalField to base units
+            converted = param.inBaseUnits()
+
+        self._params_base[name] = (param, converted)
+        return converted
+
+    def _create_eval_plan(self, expr, params, constants):
+        """
+        Classify the symbols of `expr` for :meth:`.evaluate`, and lambdify the expression on them
+
+        Args:
+            expr (int, :class:`~sympy.core.expr.Expr`): The expression to evaluate
+            params (dict): The parameter container
+            constants (dict): The params with plain numerical values, which are substituted
+                into `expr` instead of being arguments of the function
+
+        Returns:
+            tuple: the names of the variables, params and events in the order of the arguments
+            of the lambdified function, and the function
+        """
+        if constants:
+            expr = expr.xreplace({sp.Symbol(name_): sp.sympify(value)
+                                  for name_, value in constants.items()})
+
+        param_symbols = tuple(s for s in sp.symbols(tuple(params.keys()))
+                              if str(s) not in constants)
+
+        event_name_symbols = tuple(sp.symbols(tuple(self.events.keys())))
+        var_symbols = tuple(sorted(
+            expr.free_symbols.difference(param_symbols, event_name_symbols), key=str))
+        # self.logger.debug('Params available: {}'.format(param_symbols))
+        # self.logger.debug('Vars to come from domain: {}'.format(var_symbols))
+        allsymbs = var_symbols + param_symbols + event_name_symbols
 
-    def as_source_for(self, varname, **kwargs):
+        # trivial expressions, such as the variable itself in as_source_for, need no lambdify
+        if expr.is_Number:
+            value = int(expr) if expr.is_Integer else float(expr)
+            expr_func = lambda *args: value
+        elif isinstance(expr, sp.Symbol):
+            position = allsymbs.index(expr)
+            expr_func = lambda *args: args[position]
+        else:
+            # self.logger.debug('Lambdifying with args: {}'.format(allsymbs))
+            expr_func = _lambdify_cached(allsymbs, expr, self._lambdify_modules)
+
+        return (tuple(str(s) for s in var_symbols),
+                tuple(str(s) for s in param_symbols),
+                tuple(str(s) for s in event_name_symbols),
+                expr_func)
+
+    def as_source_for(self, varname, coeff = 1, **kwargs):
         """
         Cast the :attr:`.expr` as a source condition for the given variable name.
 
@@ -172,7 +252,9 @@ class Process(DomainEntity):
         If :attr:`.implicit` is False, then returns `(S,0)`. This also turns out to be the case
         when the expression `S` is linear with respect to the variable `v`.
 
-        Finally `S0` and `S1` are evaluated and returned.
+        Finally `S0` and `S1` are evaluated and returned. When `S1` is non-zero, the evaluated
+        `S0` is composed as `S - S1 * v` from the evaluated `S` and `S1`, so that it shares the
+        `S1` term with the implicit source.
 
         Args:
             varname (str): The variable that the expression is a source for
@@ -193,24 +275,28 @@ class Process(DomainEntity):
         var = sp.symbols(varname)
         varobj = self.evaluate(var, **kwargs)
 
+        # the coeff is part of the expressions, so the evaluated terms need no further multiplier
         if var not in self.expr.symbols():
-            S0 = self.expr.expr()
+            S0 = coeff * self.expr.expr()
             S1 = 0
 
         else:
-            S = self.expr.expr()
+            S = coeff * self.expr.expr()
 
             if self.implicit:
                 self.logger.debug('Attempting to split into implicit component')
-                S1 = self.expr.diff(var)
-                S0 = S - S1 * var
+                S1 = coeff * self.expr.diff(var)
                 self.logger.debug('Got S1 {}: {}'.format(type(S1), S1))
 
-                if var in S1.atoms():
+                if var in S1.free_symbols:
                     self.logger.debug(
                         'S1 dependent on {}, so should be implicit condition'.format(var))
+                    # S0 = S - S1 * var is composed from the evaluated terms below, so that
+                    # the S1 term is shared with the implicit source instead of recomputed
+                    S0 = S
 
                 else:
+                    # linear in var, so the expression is kept whole as explicit source
                     S0 = S
                     S1 = 0
 
@@ -218,13 +304,15 @@ class Process(DomainEntity):
                 S0 = S
                 S1 = 0
 
-        self.logger.debug('Source S0={}'.format(S0))
-        self.logger.debug('Source S1={}'.format(S1))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Source S0={}'.format(S0 - S1 * var if S1 else S0))
+            self.logger.debug('Source S1={}'.format(S1))
 
         self.logger.debug('Evaluating S0 and S1 now')
         S0term = self.evaluate(S0, **kwargs)
         if S1:
             S1term = self.evaluate(S1, **kwargs)
+            S0term = S0term - S1term * varobj
         else:
             S1term = 0
 
@@ -260,6 +348,10 @@ class Process(DomainEntity):
 
             * "data" : (:func:`.snapshot_var` of :meth:`.as_term`)
 
+        The term is created on the first snapshot and then reused while the expression and
+        params are unchanged, as it is a :mod:`fipy` expression of the domain variables that
+        reflects their current values.
+
         Args:
             base (bool): Convert to base units?
 
@@ -271,13 +363,26 @@ class Process(DomainEntity):
         self.logger.debug('Snapshot: {}'.format(self))
 
         state = dict()
-        meta = state['metadata'] = {}
-        meta['expr'] = str(self.expr.expr())
-        meta['param_names'] = tuple(self.params.keys())
-        for p, pval in self.params.items():
-            meta[p] = str(pval)
 
-        evaled = self.as_term()
+        # the metadata and term are only recreated if the expression or the param objects are
+        # changed (the values are kept in the cache so that their ids are not reused)
+        expr = self.expr.expr()
+        pvals = tuple(self.params.values())
+        key = (expr, tuple(self.params), tuple(map(id, pvals)))
+        if self._snapshot_meta is None or self._snapshot_meta[0] != key:
+            meta = {}
+            meta['expr'] = str(expr)
+            meta['param_names'] = tuple(self.params.keys())
+            for p, pval in self.params.items():
+                meta[p] = str(pval)
+            self._snapshot_meta = (key, pvals, meta)
+            self._term = None
+
+        state['metadata'] = dict(self._snapshot_meta[2])
+
+        if self._term is None:
+            self._term = self.as_term()
+        evaled = self._term
 
         state['data'] = snapshot_var(evaled, base=base)
 
@@ -423,8 +528,9 @@ class ProcessEvent(DomainEntity):
             unit='s',
             value=model.clock
             )
-        self._prev_clock = model.clock.copy()
-        self.logger.debug('Clock set to: {}'.format(self._prev_clock))
+        # the clock time (in seconds) of the last update
+        self._prev_clock = float(model.clock.numericValue)
+        self.logger.debug('Clock set to: {} s'.format(self._prev_clock))
         self.condition = self.process.evaluate(self.expr.expr())
 
     def on_time_updated(self, clock):
@@ -432,17 +538,24 @@ class ProcessEvent(DomainEntity):
         The event_time must be reset, wherever :attr:`.condition` evaluates to False. Wherever it
         evaluates to True, then increment the value by ``(clock - prev_clock)``.
         """
-        self.logger.debug('Updating {} to clock {}'.format(self, clock))
-        dt = clock.copy() - self._prev_clock
-        self.logger.debug('Time since last: {}'.format(dt.inUnitsOf('s')))
+        # the clock is converted to seconds, so that no fipy variables are created for the time
+        # difference, which is then scaled to the units of the event time
+        clock_ = float(clock.numericValue)
+        dt = clock_ - self._prev_clock
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Updating {} to clock {}'.format(self, clock))
+            self.logger.debug('Time since last: {} s'.format(dt))
         condition = self.condition()
-        self.event_time.setValue(self.event_time.copy() + dt)
-        self.event_time.value[~condition] = 0.0
-        self._prev_clock = clock.copy()
-
-        self.logger.debug('{} condition true in {} of {} with max time: {}'.format(
-            self,
-            np.count_nonzero(condition),
-            len(condition),
-            max(self.event_time)
-            ))
+        # increment where the condition holds and reset elsewhere, in a single pass
+        elapsed = self.event_time.value.value + dt / self.event_time.unit.factor
+        self.event_time.setValue(np.where(condition, elapsed, 0.0))
+        self._prev_clock = clock_
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('{} condition true in {} of {} with max time: {} {}'.format(
+                self,
+                np.count_nonzero(condition),
+                len(condition),
+                np.max(self.event_time.value.value),
+                self.event_time.unit.name()
+                ))
@@ -4,7 +4,10 @@ from fipy import CellVariable, PhysicalField
 from fipy.tools import numerix
 
 from .entity import DomainEntity
-from ..utils.snapshotters import restore_var, snapshot_var
+from ..utils.snapshotters import check_unit, restore_var, snapshot_var
+
+#: the locations recognized for constraints of the variable
+_VALID_CONSTRAINT_LOCS = frozenset(('top', 'bottom', 'dbl', 'sediment'))
 
 
 class ModelVariable(DomainEntity):
@@ -64,8 +67,9 @@ class ModelVariable(DomainEntity):
         self.logger.debug('{} saving create params {}'.format(self, self.create_params))
 
         #: mapping of domain location to values for boundary conditions (see :meth:`constrain`)
-        self.constraints = constraints or dict()
-        self.check_constraints(self.constraints)
+        constraints = constraints or dict()
+        self.check_constraints(constraints)
+        self.constraints = dict(constraints)
 
         self.seed_params = seed or dict()
 
@@ -112,16 +116,16 @@ class ModelVariable(DomainEntity):
         if name:
             raise ValueError('Create params should not contain name. Will be set from init name.')
 
-        from fipy import PhysicalField
         value = params.get('value', 0.0)
         if hasattr(value, 'unit'):
             unit = value.unit
         else:
             unit = params.get('unit')
 
+        check_unit(unit)
         try:
             p = PhysicalField(value, unit)
-        except:
+        except (TypeError, ValueError):
             raise ValueError('{!r} is not a valid unit!'.format(unit))
 
         pbase = p.inBaseUnits()
@@ -144,26 +148,24 @@ class ModelVariable(DomainEntity):
         """
         logger = logging.getLogger(__name__)
 
-        locs = ('top', 'bottom', 'dbl', 'sediment')
         try:
-            for loc, val in dict(constraints).items():
-                pass
+            items = dict(constraints).items()
         except (ValueError, TypeError):
             logger.error('Constraints not a mapping of pairs: {}'.format(constraints))
             raise ValueError('Constraints should be mapping of (location, value) pairs!')
 
-        for loc, val in dict(constraints).items():
+        for loc, val in items:
             loc_, grad_type = ModelVariable._parse_constraint_loc(loc)
-            if loc_ not in locs:
+            if loc_ not in _VALID_CONSTRAINT_LOCS:
                 raise ValueError('Constraint loc={!r} unknown. Should be in {}'.format(
-                    loc_, locs
+                    loc_, sorted(_VALID_CONSTRAINT_LOCS)
                     ))
             try:
                 if isinstance(val, PhysicalField):
                     v = float(val.value)
                 else:
                     v = float(val)
-            except:
+            except (TypeError, ValueError):
                 raise ValueError('Constraint should be single-valued, not {!r}'.format(val))
 
     def setup(self, **kwargs):
@@ -208,7 +210,7 @@ class ModelVariable(DomainEntity):
             if all(p in self.constraints for p in pair):
                 self.logger.warning('Constraints specified with invalid pair: {}'.format(pair))
 
-        for loc, value in dict(self.constraints).items():
+        for loc, value in self.constraints.items():
             self.constrain(loc, value)
 
     @staticmethod
@@ -226,6 +228,33 @@ class ModelVariable(DomainEntity):
                              f'which is not found on CellVariable')
         return (loc_, grad_type)
 
+    @staticmethod
+    def _to_unit_value(value, unit):
+        """
+        Returns the numeric value of `value` in `unit` if it has units, else `value` as is
+        """
+        try:
+            return value.inUnitsOf(unit).value
+        except AttributeError:
+            return value
+
+    def _check_coeff_unit(self, coeff):
+        """
+        Check that the seed `coeff`, if it has units, is compatible with the variable unit
+
+        Raises:
+            ValueError: if the units are incompatible
+        """
+        try:
+            coeff.inUnitsOf(self.var.unit)
+        except AttributeError:
+            pass
+        except TypeError:
+            self.logger.error(
+                'Coeff {!r} not compatible with variable unit {!r}'.format(
+                    coeff, self.var.unit.name()))
+            raise ValueError('Incompatible unit of coefficient')
+
     def create(self, value, unit = None, hasOld = False, **kwargs):
         """
         Create a :class:`~fipy.CellVariable` by calling :meth:`.domain.create_var`.
@@ -286,18 +315,18 @@ class ModelVariable(DomainEntity):
 
         loc, grad_type = self._parse_constraint_loc(loc)
 
-        if loc in ('top', 'bottom'):
-            mask = self._LOCs[loc]
+        if loc not in _VALID_CONSTRAINT_LOCS:
+            raise ValueError('loc={} not in {}'.format(loc, sorted(_VALID_CONSTRAINT_LOCS)))
 
-        else:
-            mask = numerix.zeros(self.var.shape, dtype=bool)
+        mask = self._LOCs[loc]
 
-            try:
-                L = self._LOCs[loc]
-                self.logger.debug('Constraint mask loc: {}'.format(L))
-                mask[L] = 1
-            except KeyError:
-                raise ValueError('loc={} not in {}'.format(loc, tuple(self._LOCs.keys())))
+        if isinstance(mask, slice):
+            # build the boolean mask once and reuse it for further constraints at loc
+            self.logger.debug('Constraint mask loc: {}'.format(mask))
+            L = mask
+            mask = numerix.zeros(self.var.shape, dtype=bool)
+            mask[L] = True
+            self._LOCs[loc] = mask
 
         if isinstance(value, PhysicalField):
             value = value.inUnitsOf(self.var.unit)
@@ -320,7 +349,7 @@ class ModelVariable(DomainEntity):
         Available profiles are:
 
             * "normal"
-                * normal distribution of values from :data:`scipy.stats.norm`
+                * normal distribution of values, as in :data:`scipy.stats.norm`
                 * `loc` and `scale` in units compatible with domain mesh
                 * `coeff` to multiply the distribution with, in units compatible with that of
                   :attr:`.var`
@@ -333,7 +362,7 @@ class ModelVariable(DomainEntity):
                 * `stop`: the stop value given, else taken from constraint "bottom"
 
             * "lognormal"
-                * lognormal distributuion from :data:`scipy.stats.lognorm`
+                * lognormal distribution of values, as in :data:`scipy.stats.lognorm`
                 * `loc` and `scale` should be in units compatible with domain mesh
                 * `shape` should be a float > 0
                 * the distribution is normalized to have max value = 1
@@ -356,82 +385,51 @@ class ModelVariable(DomainEntity):
             raise ValueError('Unknown profile {!r} not in {}'.format(profile, PROFILES))
 
         if profile == 'normal':
-            from scipy.stats import norm
             loc = kwargs['loc']
             scale = kwargs['scale']
             coeff = kwargs['coeff']
 
-            C = 1.0 / numerix.sqrt(2 * numerix.pi)
-
             # loc and scale should be in units of the domain mesh
-            if hasattr(loc, 'unit'):
-                loc_ = loc.inUnitsOf(self.domain.depths.unit).value
-            else:
-                loc_ = loc
-
-            if hasattr(scale, 'unit'):
-                scale_ = scale.inUnitsOf(self.domain.depths.unit).value
-            else:
-                scale_ = scale
-
-            if hasattr(coeff, 'unit'):
-                # check if compatible with variable unit
-                try:
-                    c = coeff.inUnitsOf(self.var.unit)
-                except TypeError:
-                    self.logger.error(
-                        'Coeff {!r} not compatible with variable unit {!r}'.format(
-                            coeff,
-                            self.var.unit.name()))
-                    raise ValueError('Incompatible unit of coefficient')
+            loc_ = self._to_unit_value(loc, self.domain.depths.unit)
+            scale_ = self._to_unit_value(scale, self.domain.depths.unit)
+
+            self._check_coeff_unit(coeff)
 
             self.logger.info(
                 'Seeding with profile normal loc: {} scale: {} coeff: {}'.format(
                     loc_, scale_,
                     coeff))
 
-            normrv = norm(loc=loc_, scale=scale_)
-            rvpdf = normrv.pdf(self.domain.depths)
+            # closed form of the normal pdf, avoiding the overhead of scipy.stats
+            z = (self.domain.depths.numericValue - loc_) / scale_
+            rvpdf = numerix.exp(-0.5 * z ** 2) / (scale_ * numerix.sqrt(2 * numerix.pi))
             rvpdf /= rvpdf.max()
             val = coeff * rvpdf
 
             self.var.value = val
 
         elif profile == 'lognormal':
-            from scipy.stats import lognorm
-
             loc = kwargs['loc']
             scale = kwargs['scale']
             coeff = kwargs['coeff']
             lognorm_shape = kwargs.get('shape', 1.25)
 
             # loc and scale should be in units of the domain mesh
-            if hasattr(loc, 'unit'):
-                loc_ = loc.inUnitsOf(self.domain.depths.unit).value
-            else:
-                loc_ = loc
-
-            if hasattr(scale, 'unit'):
-                scale_ = scale.inUnitsOf(self.domain.depths.unit).value
-            else:
-                scale_ = scale
-
-            if hasattr(coeff, 'unit'):
-                # check if compatible with variable unit
-                try:
-                    c = coeff.inUnitsOf(self.var.unit)
-                except TypeError:
-                    self.logger.error(
-                        'Coeff {!r} not compatible with variable unit {!r}'.format(
-                            coeff, self.var.unit.name()))
-                    raise ValueError('Incompatible unit of coefficient')
+            loc_ = self._to_unit_value(loc, self.domain.depths.unit)
+            scale_ = self._to_unit_value(scale, self.domain.depths.unit)
+
+            self._check_coeff_unit(coeff)
 
             self.logger.info(
                 'Seeding with profile lognormal loc: {} scale: {} shape: {} '
                 'coeff: {}'.format(loc_, scale_, lognorm_shape, coeff))
 
-            rv = lognorm(lognorm_shape, loc=loc_, scale=scale_)
-            rvpdf = rv.pdf(self.domain.depths)
+            # closed form of the lognormal pdf, which is zero for depths <= loc
+            y = (self.domain.depths.numericValue - loc_) / scale_
+            rvpdf = numerix.zeros(y.shape)
+            pos = y > 0
+            rvpdf[pos] = numerix.exp(-0.5 * (numerix.log(y[pos]) / lognorm_shape) ** 2) / (
+                y[pos] * lognorm_shape * scale_ * numerix.sqrt(2 * numerix.pi))
             rvpdf = rvpdf / rvpdf.max()
             val = coeff * rvpdf
 
@@ -459,23 +457,13 @@ class ModelVariable(DomainEntity):
                     self.logger.info('Linear seed using stop as bottom value: '
                                   '{}'.format(stop))
 
-            N = self.var.shape[0]
-
-            if hasattr(start, 'unit'):
-                start_ = start.inUnitsOf(self.var.unit).value
-            else:
-                start_ = start
-
-            if hasattr(stop, 'unit'):
-                stop_ = stop.inUnitsOf(self.var.unit).value
-            else:
-                stop_ = stop
+            start_ = self._to_unit_value(start, self.var.unit)
+            stop_ = self._to_unit_value(stop, self.var.unit)
 
             self.logger.info(
                 'Seeding with profile linear: start: {} stop: {}'.format(start_, stop_))
 
-            val = numerix.linspace(start_, stop_, N)
-            self.var.value = val
+            self.var.value = numerix.linspace(start_, stop_, self.var.shape[0])
 
         self.logger.debug('Seeded {!r} with {} profile'.format(self, profile))
 
@@ -534,6 +522,6 @@ class ModelVariable(DomainEntity):
         try:
             self.var.setValue(restore_var(state, tidx))
             self.logger.debug('{} restored state'.format(self))
-        except:
+        except (TypeError, ValueError):
             self.logger.exception('Data restore failed')
             raise ValueError('{}: restore of "data" failed!'.format(self))
@@ -1,6 +1,6 @@
 import itertools
 import logging
-from collections import defaultdict, OrderedDict
+from collections import defaultdict
 from decimal import Decimal
 
 import matplotlib.pyplot as plt
@@ -65,7 +65,7 @@ class ModelPlotter(object):
         self.axes_time = []
         self.axes_depth_linked = defaultdict(list)
         self.axes_time_linked = defaultdict(list)
-        self.artist_paths = OrderedDict()
+        self.artist_paths = {}
 
         self.unit_env = unit_env
         self.unit_microbes = unit_microbes
@@ -258,7 +258,7 @@ class ModelEquation(object):
         full_expr = obj.as_term()
         self.source_exprs[path] = coeff * full_expr
         self.source_formulae[path] = coeff * obj.expr()
-        var, S0, S1 = obj.as_source_for(self.varname)
+        var, S0, S1 = obj.as_source_for(self.varname, coeff=coeff)
         assert var is self.var, 'Got var: {!r} and self.var: {!r}'.format(
             var, self.var)
 
@@ -267,7 +267,7 @@ class ModelEquation(object):
             term = S0 + S1
         else:
             term = S0
-        self.source_terms[path] = term * coeff
+        self.source_terms[path] = term
 
         self.logger.debug('Created source {!r}: {!r}'.format(path, term))
 
@@ -282,7 +282,7 @@ class ModelEquation(object):
 
         transient = sp.Derivative(var, t)
         diffusive = D * Dcoeff * sp.Derivative(var, z, 2)
-        sources = sum(self.source_formulae.values())
+        sources = sp.Add(*self.source_formulae.values())
 
         return sp.Eq(transient, diffusive + sources)
 
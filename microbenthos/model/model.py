@@ -520,7 +520,8 @@ class MicroBenthosModel(CreateMixin):
         Callback function to update the time on all the stored entities
         """
         clock = self.clock()
-        self.logger.info('Updating entities for model clock: {}'.format(clock))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info('Updating entities for model clock: {}'.format(clock))
 
         for name, obj in self.env.items():
             obj.on_time_updated(clock)
@@ -3,7 +3,6 @@ import importlib
 import logging
 import os
 import warnings
-from collections import OrderedDict
 
 import click
 
@@ -60,7 +59,7 @@ class SimulationRunner(object):
         self._simulation = None
 
         exporters = exporters or []
-        self.exporters = OrderedDict()
+        self.exporters = {}
 
         self.output_dir = output_dir or '.'
         self._log_fh = None
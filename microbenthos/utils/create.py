@@ -52,7 +52,7 @@ class CreateMixin(object):
             definition = validate_yaml(
                 io.StringIO(obj), **kwargs)
 
-        elif isinstance(obj, (io.IOBase, file)):
+        elif isinstance(obj, io.IOBase):
             # a file-like object
             definition = validate_yaml(obj, **kwargs)
 
@@ -1,3 +1,4 @@
+import functools
 import logging
 from collections.abc import Mapping
 
@@ -11,6 +12,22 @@ from .yaml_setup import yaml
 # TODO: Allow equation with no diffusion term
 physical_unit_type = cerberus.TypeDefinition('physical_unit', (PhysicalField,), ())
 
+
+@functools.lru_cache(maxsize=1024)
+def _sympify_str(value):
+    """
+    Run the string `value` through :func:`~sympy.core.sympify.sympify`. The results are cached,
+    as the same symbol names recur across the fields of a model definition.
+    """
+    return sympify(value)
+
+
+def _sympify(value):
+    if isinstance(value, str):
+        return _sympify_str(value)
+    return sympify(value)
+
+
 class MicroBenthosSchemaValidator(cerberus.Validator):
     """
     A :mod:`cereberus` validator for schema.yml in MicroBenthos
@@ -119,7 +136,7 @@ class MicroBenthosSchemaValidator(cerberus.Validator):
     def _check_with_sympify(self, field, value):
         self.logger.debug(f'Checking if {value} usable with sympify')
         try:
-            e = sympify(value)
+            e = _sympify(value)
         except SympifyError:
             self._error(field, "Must be str compatible with sympify")
 
@@ -144,7 +161,7 @@ class MicroBenthosSchemaValidator(cerberus.Validator):
         """
         self.logger.debug(f'Check if {value} is a sympy symbol')
         try:
-            e = sympify(value)
+            e = _sympify(value)
             valid = isinstance(e, Symbol)
         except SympifyError:
             valid = False
@@ -1,7 +1,14 @@
+import ast
+
 import h5py as hdf
 from fipy import Variable, PhysicalField
 from fipy.terms.binaryTerm import _BinaryTerm
 from fipy.tools import numerix as np
+from fipy.tools.dimensions.physicalField import _unit_table
+
+#: the syntax nodes allowed in a unit string, such as ``"mol/m**3/s"``
+_UNIT_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Name, ast.Constant, ast.Load,
+               ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
 
 
 def snapshot_var(V, base = False, to_unit = None):
@@ -57,6 +64,42 @@ def snapshot_var(V, base = False, to_unit = None):
     return arr, dict(unit=unit)
 
 
+def check_unit(unit):
+    """
+    Check that a unit string can be used for :class:`PhysicalField`.
+
+    :mod:`fipy` evaluates unit strings as python expressions, so that an invalid unit can raise
+    almost any error. The string is instead checked to be a product, quotient or power of the
+    unit names known to :mod:`fipy` and non-zero numbers.
+
+    Args:
+        unit (str, None): the unit string. Other inputs are left to :class:`PhysicalField`.
+
+    Raises:
+        ValueError: if the unit string is invalid
+    """
+    if not isinstance(unit, str) or not unit.strip():
+        return
+
+    try:
+        tree = ast.parse(unit.strip(), mode='eval')
+    except SyntaxError:
+        raise ValueError('{!r} is not a valid unit!'.format(unit))
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _UNIT_NODES):
+            valid = False
+        elif isinstance(node, ast.Name):
+            valid = node.id in _unit_table
+        elif isinstance(node, ast.Constant):
+            valid = isinstance(node.value, (int, float)) and node.value != 0
+        else:
+            valid = True
+
+        if not valid:
+            raise ValueError('{!r} is not a valid unit!'.format(unit))
+
+
 def restore_var(input, tidx):
     """
     This is the inverse operation of :func:`snapshot_var`. It takes the output of that function
@@ -66,6 +109,9 @@ def restore_var(input, tidx):
     Returns:
         :class:`PhysicalField`
 
+    Raises:
+        ValueError: if the type of `input` is unknown or its unit is invalid
+
     """
     if tidx is None:
         tidx = slice(None, None)
@@ -81,4 +127,5 @@ def restore_var(input, tidx):
     else:
         raise ValueError('Unknown type {} to restore data from'.format(type(input)))
 
+    check_unit(unitstr)
     return PhysicalField(value[tidx], unit=unitstr)
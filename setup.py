@@ -18,7 +18,7 @@ requirements = [
     'click',
     'future',
     'logutils',
-    'sympy',
+    'sympy>=1.9',
     'cerberus',
     'PyYaml',
     'h5py',
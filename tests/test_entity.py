@@ -41,6 +41,10 @@ class TestEntity:
         e = Entity.from_dict(params)
         assert e.name == NAME
 
+    def test_from_params_unknown_cls(self):
+        with pytest.raises(TypeError):
+            Entity.from_params(cls='microbenthos.NoSuchEntity', init_params={})
+
 
 class TestDomainEntity:
     def test_add_domain(self):
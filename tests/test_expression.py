@@ -82,3 +82,69 @@ class TestExpression:
             e.add_piece(*[sp.sympify(_) for _ in piece])
 
         assert len(e._pieces) == len(pieces)
+
+    def test_expr_cached(self):
+
+        e = Expression(dict(base='a+b', pieces=[dict(expr='3', where='1')]))
+        out = e.expr()
+        assert e.expr() is out
+        assert e.symbols() == set(sp.symbols('a b'))
+
+        e.add_piece(sp.sympify('c'), 1)
+        assert e.expr() is not out
+        assert sp.Symbol('c') in e.symbols()
+
+    def test_as_callable(self):
+
+        e = Expression('a**2 + b')
+        func = e.as_callable(('a', 'b'))
+        assert func(2, 3) == 7
+        assert e.as_callable(('a', 'b')) is func
+        assert e.as_callable(('b', 'a'))(2, 3) == 11
+
+        # modules as a list, as documented by sympy
+        func = e.as_callable(('a', 'b'), modules=['numpy'])
+        assert func(2, 3) == 7
+        assert e.as_callable(('a', 'b'), modules=['numpy']) is func
+        assert e.as_callable(('a', 'b'), modules=[{'a': 1}, 'numpy'])(2, 3) == 7
+
+    def test_diff(self):
+
+        e = Expression('a**2 + b')
+        assert e.diff(sp.Symbol('a')) == 2 * sp.Symbol('a')
+        assert e.diff(sp.Symbol('c')) == 0
+
+    def test_sympify_cached(self):
+
+        e1 = Expression('a*b + c')
+        e2 = Expression('a*b + c')
+        assert e1.base is e2.base
+
+        e3 = Expression('a*b + c', derived=dict(c='a**2'))
+        assert e3.base != e1.base
+        assert e3.base == sp.sympify('a*b + a**2')
+
+    def test_diff_cached(self):
+
+        a = sp.Symbol('a')
+        e = Expression('a**2 + b')
+        out = e.diff(a)
+        assert e.diff(a) is out
+
+        e.add_piece(sp.sympify('a'), 1)
+        assert e.diff(a) == 3 * a ** 2 + sp.Symbol('b')
+
+    def test_parse_like_sympify(self):
+        # formulas parse as in the schema validation with sympify
+        for formula in ('f(x)', 'Km(oxy + 1)', 'x^2'):
+            assert Expression(formula).expr() == sp.sympify(formula, convert_xor=True)
+
+        with pytest.raises(ValueError):
+            Expression('3x')
+
+    def test_sympify_cached_namespace(self):
+
+        ns = dict(one=dict(vars=('x', 'Ks', 'Ki'), expr='x+Ks*Ki'))
+        e1 = Expression('one(a, b, c)', namespace=ns)
+        e2 = Expression('one(a, b, c)', namespace=ns)
+        assert e1.base is e2.base
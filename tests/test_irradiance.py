@@ -1,9 +1,11 @@
+import mock
 import numpy as np
 import pytest
 from fipy import PhysicalField, CellVariable, Variable
 from fipy.tools import numerix
 
 from microbenthos import SedimentDBLDomain, Irradiance, IrradianceChannel
+from microbenthos.core.irradiance import _attenuation_numba, _attenuation_numpy
 
 
 @pytest.fixture()
@@ -108,6 +110,30 @@ class TestIrradianceChannel:
         chan.update_intensities(100)
         assert numerix.allclose((100 * chan.attenuation_profile), chan.intensities.numericValue)
 
+        # the returned array is the live value of the intensities, and precomputed intensities
+        # are copied into it
+        I = chan.update_intensities(50)
+        assert I is chan.intensities.value
+        given = 20 * chan.attenuation_profile
+        assert chan.update_intensities(20, intensities=given) is I
+        assert not numerix.shares_memory(I, given)
+        assert numerix.allclose(I, given)
+
+    def test_attenuation_profile_recomputed(self, chan):
+        # check that the profile follows the attenuation and is not shared between calls
+        chan.setup()
+        profile = chan.attenuation_profile
+        assert not numerix.shares_memory(chan.attenuation_profile, profile)
+
+        before = profile.copy()
+        for var, val in chan.k_mods:
+            chan.domain[var].value = chan.domain[var].value * 2
+        profile = chan.attenuation_profile
+        expected = numerix.cumprod(numerix.exp(-1 * chan.k_var * chan.domain.distances))
+        assert numerix.allclose(profile, expected)
+        if chan.k_mods:
+            assert not numerix.allclose(profile, before)
+
     def test_snapshot(self, chan):
         # test the structure of snapshot dict
         # test that snapshot contains keys attenuation, intensity and metadata
@@ -135,6 +161,24 @@ class TestIrradianceChannel:
         assert 'k0' in state['metadata']
         assert state['metadata']['k0'] == chan.k0
 
+    def test_snapshot_attenuation_reused(self, chan):
+        # the attenuation state is only recreated if the attenuation changes
+        chan.setup()
+
+        state = chan.snapshot()
+        assert chan.snapshot()['attenuation'] is state['attenuation']
+        assert chan.snapshot(base=True)['attenuation'] is not state['attenuation']
+
+        state = chan.snapshot()
+        for var, val in chan.k_mods:
+            chan.domain[var].value = chan.domain[var].value * 2
+        atten = chan.snapshot()['attenuation']
+        if chan.k_mods:
+            assert atten is not state['attenuation']
+            assert not numerix.allclose(atten['data'][0], state['attenuation']['data'][0])
+        else:
+            assert atten is state['attenuation']
+
 
 class TestIrradiance:
     def test_init_empty(self):
@@ -142,7 +186,6 @@ class TestIrradiance:
         assert I.hours_total.value == 24
         assert I.day_fraction == 0.5
         assert I.zenith_level == 100
-        assert I._profile
 
     def test_init_physicalfield(self):
         ht = PhysicalField(8, 'h')
@@ -194,6 +237,29 @@ class TestIrradiance:
         irrad.on_time_updated(H / 2.0 * 3600.0)
         assert irrad.surface_irrad() == irrad.zenith_level
 
+    def test_update_time_channels(self, irrad):
+        # the channel intensities follow the surface irradiance
+        irrad.setup()
+        irrad.on_time_updated(irrad.zenith_time)
+        for ch in irrad.channels.values():
+            assert numerix.allclose(ch.intensities.numericValue,
+                                    irrad.zenith_level * ch.attenuation_profile)
+
+    def test_update_time_channels_batched(self, domain):
+        # the profiles of all channels are computed in one pass
+        irrad = Irradiance(channels=[dict(name='par', k0=PhysicalField(15.3, '1/cm')),
+                                     dict(name='nir', k0=PhysicalField(3.2, '1/cm'))])
+        irrad.set_domain(domain)
+        irrad.setup()
+        with mock.patch('microbenthos.core.irradiance._attenuation_kernel',
+                        wraps=_attenuation_numpy) as kernel:
+            irrad.on_time_updated(irrad.zenith_time)
+        kernel.assert_called_once()
+        assert kernel.call_args[0][0].shape == (2, domain.mesh.nx)
+        for ch in irrad.channels.values():
+            assert numerix.allclose(ch.intensities.numericValue,
+                                    irrad.zenith_level * ch.attenuation_profile)
+
     def test_snapshot(self, irrad):
         # Irradiance snapshot should have metadata & channels
 
@@ -216,3 +282,17 @@ class TestIrradiance:
             assert ch in channels
             # just check one field to confirm snapshot of channel
             assert channels[ch]['metadata']['k0'] == str(irrad.channels[ch].k0)
+
+
+def test_attenuation_kernels():
+    # the numpy kernel matches the direct formula, and the numba kernel matches the numpy kernel
+    k = numerix.random.random_sample((3, 50)) * 100
+    d = numerix.linspace(0, 0.01, 50)
+    expected = numerix.cumprod(numerix.exp(-k * d), axis=-1)
+
+    out = _attenuation_numpy(k, d, numerix.empty(k.shape))
+    assert numerix.allclose(out, expected)
+
+    if _attenuation_numba is None:
+        pytest.skip('numba not installed')
+    assert numerix.allclose(_attenuation_numba(k, d, numerix.empty(k.shape)), out)
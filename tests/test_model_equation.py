@@ -110,6 +110,7 @@ class TestModelEquation:
             eqn.add_source_term_from(varpath, coeff=None)
 
         eqn.add_source_term_from(varpath, coeff)
+        assert source.call_args[1] == dict(coeff=coeff)
 
         assert varpath in eqn.source_terms
         assert varpath in eqn.source_exprs
@@ -19,6 +19,9 @@ class TestVariable:
          ('kg/s', None),
          ('junk', ValueError),
          (('kg', 'm'), ValueError),
+         ('kg.m', ValueError),
+         ('m/0', ValueError),
+         ('m**', ValueError),
          ('m/s', None),
          ]
         )
@@ -31,6 +34,16 @@ class TestVariable:
         else:
             ModelVariable.check_create(**D)
 
+    @pytest.mark.parametrize('unit', ['junk', 'kg.m', 'm/0'])
+    def test_restore_from_invalid_unit(self, unit):
+        v = ModelVariable(name='mvar', create=dict(value=3.2, unit='mol/l'))
+        v.domain = mock.Mock(SedimentDBLDomain)
+        v.var = mock.Mock()
+
+        with pytest.raises(ValueError):
+            v.restore_from((numerix.ones(5), dict(unit=unit)), None)
+        v.var.setValue.assert_not_called()
+
     def test_create_check_name(self):
         # supplying name in create params should raise an error
         with pytest.raises(ValueError):
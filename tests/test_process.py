@@ -3,6 +3,16 @@ import pytest
 import sympy as sp
 
 from microbenthos import Process, Expression, ProcessEvent
+from microbenthos.core.process import _lambdify_cached
+
+
+@pytest.fixture(autouse=True)
+def clear_lambdify_cache():
+    # the lambdified functions are shared across processes, so the (mocked) functions are not
+    # kept between tests
+    _lambdify_cached.cache_clear()
+    yield
+    _lambdify_cached.cache_clear()
 
 
 @pytest.fixture()
@@ -66,6 +76,93 @@ class TestProcess:
         dom.__getitem__.assert_any_call('y')
         efunc.assert_called_once_with(dom['x'], dom['y'], Z.inBaseUnits())
 
+    @mock.patch('sympy.lambdify')
+    def test_evaluate_cached(self, lambdify, proc):
+        # the expression is lambdified once and then reused, until the expr is set again
+        dom = mock.MagicMock(name='domain')
+        expr = proc.expr.expr()
+
+        proc.evaluate(expr, domain=dom)
+        proc.evaluate(expr, domain=dom)
+        assert lambdify.call_count == 1
+        assert len(proc._eval_plans) == 1
+
+        proc.evaluate(sp.Symbol('x') * sp.Symbol('y'), domain=dom)
+        assert lambdify.call_count == 2
+
+        # the symbols are classified again if the param names change, but the function for the
+        # same arguments is shared
+        Z = mock.Mock()
+        proc.evaluate(expr, params=dict(z=Z), domain=dom)
+        assert len(proc._eval_plans) == 3
+        assert lambdify.call_count == 2
+        proc.evaluate(expr, params=dict(z=mock.Mock()), domain=dom)
+        assert len(proc._eval_plans) == 3
+
+        # plain numbers are substituted, so a new value is lambdified again
+        proc.evaluate(expr, params=dict(z=3), domain=dom)
+        assert lambdify.call_count == 3
+        assert lambdify.call_args[0] == (sp.symbols('x y'), 27 * sp.Symbol('x') * sp.Symbol('y'))
+        proc.evaluate(expr, params=dict(z=3), domain=dom)
+        assert lambdify.call_count == 3
+        proc.evaluate(expr, params=dict(z=4), domain=dom)
+        assert lambdify.call_count == 4
+
+        proc.expr = dict(formula='x*y*z**3')
+        assert not proc._eval_plans
+        proc.evaluate(expr, domain=dom)
+        assert len(proc._eval_plans) == 1
+
+    @mock.patch('sympy.lambdify')
+    def test_evaluate_shared(self, lambdify):
+        # processes with the same expression share the lambdified function
+        dom = mock.MagicMock(name='domain')
+        proc1 = Process(expr=dict(formula='x*y*z**3'))
+        proc2 = Process(expr=dict(formula='x*y*z**3'))
+        proc1.evaluate(proc1.expr.expr(), params=dict(z=mock.Mock()), domain=dom)
+        proc2.evaluate(proc2.expr.expr(), params=dict(z=mock.Mock()), domain=dom)
+        assert lambdify.call_count == 1
+
+        proc2.evaluate(proc2.expr.expr(), params=dict(z=2), domain=dom)
+        assert lambdify.call_count == 2
+
+    @mock.patch('sympy.lambdify')
+    def test_evaluate_trivial(self, lambdify, proc):
+        # a single symbol or a number is not lambdified
+        dom = mock.MagicMock(name='domain')
+        Z = mock.Mock()
+
+        assert proc.evaluate(sp.Symbol('x'), domain=dom) is dom['x']
+        assert proc.evaluate(sp.Symbol('z'), params=dict(z=Z), domain=dom) is Z.inBaseUnits()
+        assert proc.evaluate(sp.Symbol('z'), params=dict(z=3), domain=dom) == 3
+        assert proc.evaluate(sp.Rational(1, 2), domain=dom) == 0.5
+        lambdify.assert_not_called()
+
+    @mock.patch('sympy.lambdify')
+    def test_evaluate_constants_exact(self, lambdify, proc):
+        # numerical constants are left exact for lambdify to evaluate
+        dom = mock.MagicMock(name='domain')
+        x = sp.Symbol('x')
+        proc.evaluate(sp.sqrt(sp.Symbol('z')) * x + sp.pi / 3, params=dict(z=2), domain=dom)
+        assert lambdify.call_args[0] == ((x,), sp.sqrt(2) * x + sp.pi / 3)
+
+    @mock.patch('sympy.lambdify')
+    def test_evaluate_params_base_units(self, lambdify, proc):
+        # params are converted to base units once, while the same param object is used
+        dom = mock.MagicMock(name='domain')
+        Z = mock.Mock()
+        params = dict(z=Z)
+        lambdify.return_value = efunc = mock.MagicMock()
+
+        proc.evaluate(proc.expr.expr(), params=params, domain=dom)
+        proc.evaluate(proc.expr.expr(), params=params, domain=dom)
+        Z.inBaseUnits.assert_called_once()
+        assert efunc.call_args[0][-1] is Z.inBaseUnits()
+
+        params['z'] = Z2 = mock.Mock()
+        proc.evaluate(proc.expr.expr(), params=params, domain=dom)
+        Z2.inBaseUnits.assert_called_once()
+
     def test_as_source_for(self, proc):
         # since process.evaluate() is tested, we just check here that it returns the variable
         # object and (S0, S1) term
@@ -78,6 +175,30 @@ class TestProcess:
         assert vobj == proc.evaluate(sp.Symbol('x'))
         assert S0 == proc.evaluate(proc.expr.expr())
 
+    def test_as_source_for_implicit(self):
+        # S0 = S - S1 * x is composed from the evaluated S1 term
+        proc = Process(expr=dict(formula='x**2 * y'))
+
+        from microbenthos.core import SedimentDBLDomain
+        domain = SedimentDBLDomain()
+        domain.create_var('y', value=3)
+        domain.create_var('x', value=2)
+        proc.set_domain(domain)
+
+        vobj, S0, S1 = proc.as_source_for('x')
+        assert vobj is domain['x']
+        assert (S1() == 12).all()
+        assert (S0() == -12).all()
+
+        domain['x'].value = 1
+        assert (S1() == 6).all()
+        assert (S0() == -3).all()
+
+        # the coeff is applied to both terms
+        vobj, S0, S1 = proc.as_source_for('x', coeff=-2)
+        assert (S1() == -12).all()
+        assert (S0() == 6).all()
+
     def test_snapshot(self):
         pdict = dict(z=35)
         proc = Process(expr=dict(formula='x*y*z**3'),
@@ -100,6 +221,53 @@ class TestProcess:
         metakeys.update(pdict)
         assert set(state['metadata']) == metakeys
 
+    def test_snapshot_term_reused(self):
+        proc = Process(expr=dict(formula='x*y*z**3'), params=dict(z=2))
+
+        from microbenthos.core import SedimentDBLDomain
+        domain = SedimentDBLDomain()
+        domain.create_var('y', value=3)
+        domain.create_var('x', value=2)
+        proc.set_domain(domain)
+
+        with mock.patch.object(proc, 'as_term', wraps=proc.as_term) as as_term:
+            state = proc.snapshot()
+            assert (state['data'][0] == 48).all()
+
+            # the same term reflects the current values of the variables
+            domain['x'].value = 1
+            state = proc.snapshot()
+            assert (state['data'][0] == 24).all()
+            as_term.assert_called_once()
+
+            proc.expr = dict(formula='x*y')
+            state = proc.snapshot()
+            assert (state['data'][0] == 3).all()
+            assert as_term.call_count == 2
+
+        # the metadata follows the expr and params
+        assert state['metadata']['expr'] == 'x*y'
+        assert state['metadata']['z'] == '2'
+        proc.params['z'] = 5
+        assert proc.snapshot()['metadata']['z'] == '5'
+
+    def test_snapshot_param_changed(self):
+        # the data follows a changed param value, like the metadata
+        proc = Process(expr=dict(formula='x*y*z**3'), params=dict(z=2))
+
+        from microbenthos.core import SedimentDBLDomain
+        domain = SedimentDBLDomain()
+        domain.create_var('y', value=3)
+        domain.create_var('x', value=2)
+        proc.set_domain(domain)
+
+        assert (proc.snapshot()['data'][0] == 48).all()
+
+        proc.params['z'] = 3
+        state = proc.snapshot()
+        assert state['metadata']['z'] == '3'
+        assert (state['data'][0] == 162).all()
+
     def test_restore_from(self):
         pdict = dict(z=35)
         proc = Process(expr=dict(formula='x*y*z**3'),
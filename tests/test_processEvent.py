@@ -1,4 +1,5 @@
 import mock
+import numpy as np
 import pytest
 from fipy import PhysicalField, Variable
 
@@ -33,9 +34,7 @@ class TestProcessEvent:
         proc.evaluate.return_value = CONDITION = object()
 
         model = mock.MagicMock(MicroBenthosModel)
-        CLOCK_VAL = Variable(2.5, 'h')
-        model.clock = mock.Mock(return_value=CLOCK_VAL)
-        model.clock.copy.return_value = CLOCK_VAL
+        model.clock = Variable(2.5, 'h')
 
         expr = mock.MagicMock(Expression)
         expr.expr.return_value = EXPR = object()
@@ -50,7 +49,7 @@ class TestProcessEvent:
             unit='s',
             value=model.clock
             )
-        assert isinstance(pe._prev_clock, Variable)
+        assert pe._prev_clock == 2.5 * 3600
         expr.expr.assert_called_once()
 
         proc.evaluate.assert_called_once_with(EXPR)
@@ -63,29 +62,23 @@ class TestProcessEvent:
 
         pe = ProcessEvent(expr)
 
-        CONDVAL = mock.MagicMock()
-        pe.condition = mock.Mock(return_value=CONDVAL)
-        CONDVAL.__invert__.return_value = NEG = object()
+        pe.condition = mock.Mock(return_value=np.array([True, False, True]))
+        pe._prev_clock = 2.0
+        pe.event_time = Variable(value=[1.0, 2.0, 3.0], unit='s')
 
-        PREVVAL = PhysicalField(2, 's')
-        pe._prev_clock = PREV = mock.MagicMock(return_value=PREVVAL)
-        clock = mock.MagicMock()
-        DIFF_VAL = PhysicalField(5, 's')
-        clock.__sub__ = mock.Mock(return_value=DIFF_VAL)
+        pe.on_time_updated(PhysicalField(7, 's'))
 
-        EVENTVAL = PhysicalField(9, 's')
-        pe.event_time = mock.MagicMock(return_value=EVENTVAL)
-        pe.event_time.value = mock.MagicMock()
-        pe.event_time.__iter__.return_value = [1, 2]
-
-        pe.on_time_updated(clock)
-
-        clock.copy().__sub__.assert_called_once()
         pe.condition.assert_called_once()
-        pe.event_time.setValue.assert_called_once()
-
-        CONDVAL.__invert__.assert_called_once()
-
-        pe.event_time.value.__setitem__.assert_called_once_with(
-            NEG, 0.0)
-
+        # incremented by the clock difference where the condition holds, else reset
+        assert np.allclose(pe.event_time.value, [6, 0, 8])
+        assert pe.event_time.unit.name() == 's'
+
+        pe.on_time_updated(PhysicalField(1, 'min'))
+        assert np.allclose(pe.event_time.value, [59, 0, 61])
+
+        # the event time is incremented in its own units
+        pe._prev_clock = 0.0
+        pe.event_time = Variable(value=[1.0, 2.0, 3.0], unit='h')
+        pe.on_time_updated(PhysicalField(1800, 's'))
+        assert np.allclose(pe.event_time.value.value, [1.5, 0, 3.5])
+        assert pe.event_time.unit.name() == 'h'